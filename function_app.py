@@ -1,42 +1,279 @@
 import logging
-import json
 import datetime
+import functools
+import importlib
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import TYPE_CHECKING
 
 import azure.functions as func
-import pandas as pd
+import orjson
 
-from mowi_finance import (
-    get_mowi_data,
-    get_mowi_history,
-    get_mowi_actions,
-    get_mowi_financials,
-    get_mowi_recommendations,
-)
+logger = logging.getLogger(__name__)
 
-def df_to_records(df: pd.DataFrame) -> list[dict]:
+# pandas and mowi_finance (which pulls in yfinance) are imported inside the
+# functions that need them, so indexing the app on a cold worker stays cheap.
+if TYPE_CHECKING:
+    import pandas as pd
+
+# On Azure, start that import (and the cache warm-up it triggers) in the
+# background instead, so it overlaps worker start-up rather than delaying
+# either the indexing of this module or the first request.
+if os.environ.get("AZURE_FUNCTIONS_ENVIRONMENT"):
+    threading.Thread(
+        target=importlib.import_module, args=("mowi_finance",), daemon=True
+    ).start()
+
+def _reset_index(df: "pd.DataFrame") -> "pd.DataFrame":
+    """
+    Move the index into a column, unless it is a plain unnamed 0..n-1
+    RangeIndex that carries no information (saves copying the frame).
+    """
+    import pandas as pd
+
+    idx = df.index
+    if (
+        isinstance(idx, pd.RangeIndex)
+        and idx.name is None
+        and idx.start == 0
+        and idx.step == 1
+        and idx.stop == len(df)
+    ):
+        return df
+    return df.reset_index()
+
+
+def _column_names(columns: "pd.Index") -> list[str]:
+    """
+    Column labels as strings: any datetime-like → ISO string, others → str().
+    """
+    import pandas as pd
+
+    if isinstance(columns, pd.DatetimeIndex) and columns.tz is None and not columns.hasnans:
+        # One vectorized call for the common all-dates case (financial
+        # statements) instead of an isinstance check per label.
+        return columns.strftime("%Y-%m-%dT%H:%M:%S").tolist()
+    return [
+        c.isoformat() if isinstance(c, (datetime.datetime, datetime.date)) else str(c)
+        for c in columns
+    ]
+
+
+def _datetimes_to_iso(series: "pd.Series") -> list:
     """
-    Reset index, convert any Timestamp or datetime column names to ISO strings,
-    then return to_dict(orient='records').
+    Format a datetime64 column as ISO strings with numpy, matching
+    Timestamp.isoformat(): tz-aware values keep their own wall time and a
+    "+HH:MM" offset (e.g. "2025-01-02T00:00:00+01:00"); NaT becomes None.
     """
-    df = df.reset_index()
+    import numpy as np
+
+    if series.dt.tz is not None:
+        wall = series.dt.tz_localize(None).to_numpy()
+        utc = series.dt.tz_convert("UTC").dt.tz_localize(None).to_numpy()
+    else:
+        wall = series.to_numpy()
+        utc = None
+
+    isnat = np.isnat(wall)
+    out = np.datetime_as_string(wall, unit="s").astype(object)
+    # Like isoformat(), only show microseconds where there are any.
+    frac = ~isnat & (wall != wall.astype("datetime64[s]"))
+    if frac.any():
+        out[frac] = np.datetime_as_string(wall[frac], unit="us")
+
+    if utc is not None:
+        # Offsets differ across DST, but there are only a handful of them,
+        # so format each distinct one once.
+        delta = wall - utc
+        delta[isnat] = np.timedelta64(0, "ns")
+        minutes = (delta // np.timedelta64(1, "m")).astype(int)
+        offsets, inverse = np.unique(minutes, return_inverse=True)
+        suffixes = np.array(
+            ["%s%02d:%02d" % ("-" if m < 0 else "+", abs(m) // 60, abs(m) % 60) for m in offsets],
+            dtype=object,
+        )
+        out = out + suffixes[inverse]
+
+    out[isnat] = None
+    return out.tolist()
 
-    # Rename columns: any datetime-like → ISO string, others → str()
-    new_cols = {}
-    for col in df.columns:
-        if isinstance(col, (pd.Timestamp, datetime.datetime, datetime.date)):
-            new_cols[col] = col.isoformat()
+
+def df_to_records(df: "pd.DataFrame", orient: str = "records") -> list[dict] | dict[str, list]:
+    """
+    Reset index (unless it is a plain 0..n-1 RangeIndex), convert any Timestamp
+    or datetime column names to ISO strings, then build the list of row dicts
+    from the column arrays. With orient="columns", return {column: values}
+    instead, which skips the per-row dicts entirely.
+    """
+    # Name the original columns before the reset: once the index is moved in,
+    # a DatetimeIndex of statement dates turns into a mixed object Index.
+    # Only the output keys change, so df itself (possibly the caller's frame
+    # when the reset is skipped) is left untouched.
+    cols = _column_names(df.columns)
+    reset = _reset_index(df)
+    if reset is not df:
+        cols = _column_names(reset.columns[: reset.shape[1] - df.shape[1]]) + cols
+    df = reset
+
+    # Pull each column out once as native Python values instead of letting
+    # to_dict box every cell. Datetime columns become ISO strings here, so
+    # the result is plain JSON primitives and the encoder never has to call
+    # back into the default hook.
+    arrs = []
+    for _, series in df.items():
+        if series.dtype.kind == "M":
+            arrs.append(_datetimes_to_iso(series))
         else:
-            new_cols[col] = str(col)
-    df = df.rename(columns=new_cols)
+            arrs.append(series.to_numpy().tolist())
 
-    return df.to_dict(orient="records")
+    if orient == "columns":
+        return dict(zip(cols, arrs))
+    return [dict(zip(cols, row)) for row in zip(*arrs)]
 
 
-class DateTimeEncoder(json.JSONEncoder):
-    def default(self, obj):
-        if isinstance(obj, (datetime.date, datetime.datetime)):
-            return obj.isoformat()
-        return super().default(obj)
+def df_to_json_bytes(df: "pd.DataFrame") -> bytes:
+    """
+    Encode the frame as a JSON array of records using pandas' C serializer.
+    Only for frames with plain string column names.
+    """
+    reset = _reset_index(df)
+    # to_json would render tz-aware values in UTC, so pre-format datetime
+    # columns (including a reset-in index) the same way df_to_records does.
+    # Replacing columns on a shallow copy leaves the caller's frame alone.
+    dt_cols = [c for c, dtype in reset.dtypes.items() if dtype.kind == "M"]
+    if dt_cols:
+        reset = reset.copy(deep=False)
+        for c in dt_cols:
+            reset[c] = _datetimes_to_iso(reset[c])
+    return reset.to_json(
+        orient="records",
+        date_format="iso",
+        date_unit="s",
+        double_precision=15,
+    ).encode()
+
+
+ARROW_STREAM_MIMETYPE = "application/vnd.apache.arrow.stream"
+
+def _accept_quality(accept: str, mimetype: str) -> float:
+    """
+    The q value the Accept header gives `mimetype` when listed explicitly,
+    or 0.0 if it isn't. Wildcards are ignored: JSON is the default for those.
+    """
+    for media_range in accept.split(","):
+        media_type, *params = (part.strip() for part in media_range.split(";"))
+        if media_type.lower() != mimetype:
+            continue
+        q = 1.0
+        for param in params:
+            name, _, value = param.partition("=")
+            if name.strip().lower() == "q":
+                try:
+                    q = float(value)
+                except ValueError:
+                    q = 0.0
+        return q
+    return 0.0
+
+
+def df_to_arrow_stream(df: "pd.DataFrame") -> bytes:
+    """
+    Encode the frame (index included) as a zstd-compressed Arrow IPC stream.
+    """
+    # pyarrow is only needed by clients that ask for Arrow, so keep it off
+    # the import path of every other request.
+    import pyarrow as pa
+
+    table = pa.Table.from_pandas(df)
+    sink = pa.BufferOutputStream()
+    options = pa.ipc.IpcWriteOptions(compression="zstd")
+    with pa.ipc.new_stream(sink, table.schema, options=options) as writer:
+        writer.write_table(table)
+    return sink.getvalue().to_pybytes()
+
+
+_DUMPS_OPTION = orjson.OPT_SERIALIZE_NUMPY
+
+def _default(obj):
+    # orjson handles plain datetime/date natively; pd.Timestamp is a subclass
+    # it refuses, so fall back to the same ISO format here.
+    if isinstance(obj, (datetime.date, datetime.datetime)):
+        return obj.isoformat()
+    raise TypeError
+
+
+def dumps(obj) -> bytes:
+    """
+    Serialize to JSON bytes with orjson, passing numpy scalars/arrays through
+    natively and ISO-formatting any remaining datetime values.
+    """
+    return orjson.dumps(obj, option=_DUMPS_OPTION, default=_default)
+
+
+def _json_object(fields) -> bytes:
+    """
+    Stitch (key, encoded value) pairs into one JSON object. Values are
+    consumed lazily, so each section can be built and freed in turn.
+    """
+    return b"{" + b",".join(dumps(key) + b":" + value for key, value in fields) + b"}"
+
+
+# Pre-encoded response bodies: key -> (expires_at, body). Fundamentals change
+# at most daily, so their JSON is reused for an hour; the full GetMowiData
+# payload (keyed per `days`) only briefly, since it carries the live quote.
+BODY_CACHE_TTL = 3600
+PAYLOAD_CACHE_TTL = 30
+_BODY_CACHE: dict = {}
+
+def _cached_body(key, ttl, build) -> bytes:
+    """
+    Return the cached body for `key` if it is younger than `ttl` seconds,
+    otherwise call `build()` to produce fresh bytes and cache them.
+    """
+    now = time.monotonic()
+    expires_at, body = _BODY_CACHE.get(key, (0.0, None))
+    if body is None or now >= expires_at:
+        # Drop other expired entries too, so keys built from request
+        # parameters can't accumulate.
+        for stale_key, (stale_expiry, _) in list(_BODY_CACHE.items()):
+            if now >= stale_expiry:
+                _BODY_CACHE.pop(stale_key, None)
+        body = build()
+        _BODY_CACHE[key] = (now + ttl, body)
+    return body
+
+
+def _json_response(body: bytes, status_code: int = 200, headers=None) -> func.HttpResponse:
+    return func.HttpResponse(
+        body=body, status_code=status_code, headers=headers, mimetype="application/json"
+    )
+
+
+def _json_endpoint(fn):
+    """
+    Wrap an HTTP handler so it only returns its payload: an object to encode,
+    pre-encoded JSON bytes, or a ready func.HttpResponse (passed through
+    as is). Any exception is logged and turned into a JSON 500 response.
+
+    Wrapped handlers keep their `-> func.HttpResponse` annotation: the worker
+    reads the binding signature through functools.wraps' __wrapped__.
+    """
+    @functools.wraps(fn)
+    def wrapper(req: func.HttpRequest) -> func.HttpResponse:
+        try:
+            result = fn(req)
+            if isinstance(result, func.HttpResponse):
+                return result
+            if not isinstance(result, bytes):
+                result = dumps(result)
+            return _json_response(result)
+        except Exception as e:
+            logger.error("Error in %s", fn.__name__, exc_info=True)
+            return _json_response(dumps({"error": str(e)}), status_code=500)
+
+    return wrapper
 
 
 app = func.FunctionApp()
@@ -44,8 +281,10 @@ app = func.FunctionApp()
 # ===== GetMowiData (full payload) adding comment to check if it gets deployed=====
 @app.function_name(name="GetMowiData")
 @app.route(route="GetMowiData", auth_level=func.AuthLevel.ANONYMOUS)
+@_json_endpoint
 def GetMowiData(req: func.HttpRequest) -> func.HttpResponse:
-    logging.info("GetMowiData HTTP trigger processed a request.")
+    """Returns quote, history, actions, financials and recommendations."""
+    logger.debug("GetMowiData HTTP trigger processed a request.")
 
     # Parse optional 'days' param (default 30)
     days_param = req.params.get("days")
@@ -54,142 +293,133 @@ def GetMowiData(req: func.HttpRequest) -> func.HttpResponse:
     except ValueError:
         days = 30
 
-    try:
-        # Fetch all data
-        quote = get_mowi_data()
-        history_df = get_mowi_history(days)
-        actions_df = get_mowi_actions()
-        financials = get_mowi_financials()
-        recs_df = get_mowi_recommendations()
-
-        # Build the payload, converting each DataFrame via df_to_records
-        payload = {
-            "quote": quote,
-            "history": df_to_records(history_df),
-            "actions": df_to_records(actions_df),
-            "financials": {
-                stmt: df_to_records(df)
-                for stmt, df in financials.items()
-            },
-            "recommendations": df_to_records(recs_df),
-        }
+    from mowi_finance import (
+        get_mowi_data,
+        get_mowi_history,
+        get_mowi_actions,
+        get_mowi_financials,
+        get_mowi_recommendations,
+    )
 
-        # Serialize to JSON, with full ISO dates for any datetime values
-        body = json.dumps(payload, cls=DateTimeEncoder)
+    def build():
+        # Fetch all data; each call is an independent round-trip to Yahoo,
+        # so run them concurrently. This relies on every getter building its
+        # own yf.Ticker (see mowi_finance._ticker): a shared instance is not
+        # thread-safe. result() re-raises any fetch error.
+        with ThreadPoolExecutor(max_workers=5) as ex:
+            quote_f = ex.submit(get_mowi_data)
+            history_f = ex.submit(get_mowi_history, days)
+            actions_f = ex.submit(get_mowi_actions)
+            financials_f = ex.submit(get_mowi_financials)
+            recs_f = ex.submit(get_mowi_recommendations)
 
-        return func.HttpResponse(
-            body=body,
-            status_code=200,
-            mimetype="application/json"
-        )
+            quote = quote_f.result()
+            history_df = history_f.result()
+            actions_df = actions_f.result()
+            financials = financials_f.result()
+            recs_df = recs_f.result()
+
+        # Encode each section on its own and stitch the bytes together, so
+        # only one section's records are alive at a time instead of the
+        # whole nested payload plus its encoded copy.
+        return _json_object((
+            ("quote", dumps(quote)),
+            ("history", df_to_json_bytes(history_df)),
+            ("actions", df_to_json_bytes(actions_df)),
+            ("financials", _json_object(
+                (stmt, dumps(df_to_records(df)))
+                for stmt, df in financials.items()
+            )),
+            ("recommendations", df_to_json_bytes(recs_df)),
+        ))
+
+    return _cached_body(("GetMowiData", days), PAYLOAD_CACHE_TTL, build)
 
-    except Exception as e:
-        logging.error("Error fetching Mowi data", exc_info=True)
-        error_body = json.dumps({"error": str(e)})
-        return func.HttpResponse(
-            body=error_body,
-            status_code=500,
-            mimetype="application/json"
-        )
 # ===== GetMowiQuote =====
 @app.function_name(name="GetMowiQuote")
 @app.route(route="GetMowiQuote", auth_level=func.AuthLevel.ANONYMOUS)
+@_json_endpoint
 def GetMowiQuote(req: func.HttpRequest) -> func.HttpResponse:
     """Returns the current Mowi quote as JSON."""
-    try:
-        quote = get_mowi_data()
-        body = json.dumps(quote, cls=DateTimeEncoder)
-        return func.HttpResponse(body=body, status_code=200, mimetype="application/json")
-    except Exception as e:
-        logging.error("Error in GetMowiQuote", exc_info=True)
-        error_body = json.dumps({"error": str(e)})
-        return func.HttpResponse(
-            body=error_body,
-            status_code=500,
-            mimetype="application/json"
-        )
+    from mowi_finance import get_mowi_data
+
+    # The quote is a flat dict of str/int/float, so plain orjson suffices.
+    return orjson.dumps(get_mowi_data())
 
 # ===== GetMowiHistory =====
 @app.function_name(name="GetMowiHistory")
 @app.route(route="GetMowiHistory", auth_level=func.AuthLevel.ANONYMOUS)
+@_json_endpoint
 def GetMowiHistory(req: func.HttpRequest) -> func.HttpResponse:
     """Returns historical data for Mowi over the specified number of days."""
     try:
         days = int(req.params.get("days", 30))
-        records = df_to_records(get_mowi_history(days))
-        body = json.dumps(records, cls=DateTimeEncoder)
-        return func.HttpResponse(body=body, status_code=200, mimetype="application/json")
     except ValueError:
-        logging.warning("Invalid 'days' parameter for GetMowiHistory", exc_info=True)
-        error_body = json.dumps({"error": "Parameter 'days' must be an integer."})
-        return func.HttpResponse(
-            body=error_body,
+        logger.warning("Invalid 'days' parameter for GetMowiHistory", exc_info=True)
+        return _json_response(
+            dumps({"error": "Parameter 'days' must be an integer."}),
             status_code=400,
-            mimetype="application/json"
         )
-    except Exception as e:
-        logging.error("Error in GetMowiHistory", exc_info=True)
-        error_body = json.dumps({"error": str(e)})
+
+    from mowi_finance import get_mowi_history
+
+    # The representation depends on Accept, so shared caches must key on it.
+    headers = {"Vary": "Accept"}
+    history_df = get_mowi_history(days)
+    accept = req.headers.get("accept", "")
+    arrow_q = _accept_quality(accept, ARROW_STREAM_MIMETYPE)
+    if arrow_q > 0 and arrow_q >= _accept_quality(accept, "application/json"):
+        body = df_to_arrow_stream(history_df)
         return func.HttpResponse(
-            body=error_body,
-            status_code=500,
-            mimetype="application/json"
+            body=body, status_code=200, headers=headers, mimetype=ARROW_STREAM_MIMETYPE
         )
+    if req.params.get("format") == "columns":
+        body = dumps(df_to_records(history_df, orient="columns"))
+    else:
+        body = df_to_json_bytes(history_df)
+    return _json_response(body, headers=headers)
 
 # ===== GetMowiActions =====
 @app.function_name(name="GetMowiActions")
 @app.route(route="GetMowiActions", auth_level=func.AuthLevel.ANONYMOUS)
+@_json_endpoint
 def GetMowiActions(req: func.HttpRequest) -> func.HttpResponse:
     """Returns corporate actions for Mowi."""
-    try:
-        actions = df_to_records(get_mowi_actions())
-        body = json.dumps(actions, cls=DateTimeEncoder)
-        return func.HttpResponse(body=body, status_code=200, mimetype="application/json")
-    except Exception as e:
-        logging.error("Error in GetMowiActions", exc_info=True)
-        error_body = json.dumps({"error": str(e)})
-        return func.HttpResponse(
-            body=error_body,
-            status_code=500,
-            mimetype="application/json"
-        )
+    from mowi_finance import get_mowi_actions
+
+    return _cached_body(
+        "GetMowiActions",
+        BODY_CACHE_TTL,
+        lambda: df_to_json_bytes(get_mowi_actions()),
+    )
 
 # ===== GetMowiFinancials =====
 @app.function_name(name="GetMowiFinancials")
 @app.route(route="GetMowiFinancials", auth_level=func.AuthLevel.ANONYMOUS)
+@_json_endpoint
 def GetMowiFinancials(req: func.HttpRequest) -> func.HttpResponse:
     """Returns the financial statements for Mowi."""
-    try:
-        financials = get_mowi_financials()
-        formatted = {stmt: df_to_records(df) for stmt, df in financials.items()}
-        body = json.dumps(formatted, cls=DateTimeEncoder)
-        return func.HttpResponse(body=body, status_code=200, mimetype="application/json")
-    except Exception as e:
-        logging.error("Error in GetMowiFinancials", exc_info=True)
-        error_body = json.dumps({"error": str(e)})
-        return func.HttpResponse(
-            body=error_body,
-            status_code=500,
-            mimetype="application/json"
-        )
+    from mowi_finance import get_mowi_financials
+
+    return _cached_body(
+        "GetMowiFinancials",
+        BODY_CACHE_TTL,
+        lambda: dumps({
+            stmt: df_to_records(df)
+            for stmt, df in get_mowi_financials().items()
+        }),
+    )
 
 # ===== GetMowiRecommendations =====
 @app.function_name(name="GetMowiRecommendations")
 @app.route(route="GetMowiRecommendations", auth_level=func.AuthLevel.ANONYMOUS)
+@_json_endpoint
 def GetMowiRecommendations(req: func.HttpRequest) -> func.HttpResponse:
     """Returns analyst recommendations for Mowi."""
-    try:
-        recs = df_to_records(get_mowi_recommendations())
-        body = json.dumps(recs, cls=DateTimeEncoder)
-        return func.HttpResponse(body=body, status_code=200, mimetype="application/json")
-    except Exception as e:
-        logging.error("Error in GetMowiRecommendations", exc_info=True)
-        error_body = json.dumps({"error": str(e)})
-        return func.HttpResponse(
-            body=error_body,
-            status_code=500,
-            mimetype="application/json"
-        )
-
-        
+    from mowi_finance import get_mowi_recommendations
 
+    return _cached_body(
+        "GetMowiRecommendations",
+        BODY_CACHE_TTL,
+        lambda: df_to_json_bytes(get_mowi_recommendations()),
+    )
@@ -1,14 +1,33 @@
 import yfinance as yf
 import datetime
+import os
+import threading
+
+from cachetools.func import ttl_cache
 
 TICKER = "MOWI.OL"
 
+# Seconds the getters below keep their results for warm invocations.
+# Returned dicts and DataFrames are shared between callers and must not be
+# mutated.
+QUOTE_TTL = 60
+FUNDAMENTALS_TTL = 3600
+
+def _ticker():
+    """
+    Returns a new Ticker for MOWI.OL. Each getter gets its own instance:
+    GetMowiData calls them concurrently, and yfinance's Ticker (its price
+    history state in particular) is not safe to share between threads.
+    Reuse across warm invocations comes from the TTL caches instead.
+    """
+    return yf.Ticker(TICKER)
+
+@ttl_cache(maxsize=1, ttl=QUOTE_TTL)
 def get_mowi_data():
     """
     Fetches real‐time quote data for MOWI.OL.
     """
-    t = yf.Ticker(TICKER)
-    info = t.info
+    info = _ticker().info
     return {
         "symbol": info.get("symbol"),
         "last_price": info.get("regularMarketPrice"),
@@ -21,6 +40,7 @@ def get_mowi_data():
         "currency": info.get("currency"),
     }
 
+@ttl_cache(maxsize=16, ttl=QUOTE_TTL)
 def get_mowi_history(days=30, interval="1d"):
     """
     Returns a DataFrame of the last `days` days of historical data,
@@ -28,14 +48,16 @@ def get_mowi_history(days=30, interval="1d"):
     """
     end = datetime.date.today()
     start = end - datetime.timedelta(days=days)
-    return yf.Ticker(TICKER).history(start=start, end=end, interval=interval)
+    return _ticker().history(start=start, end=end, interval=interval)
 
+@ttl_cache(maxsize=1, ttl=FUNDAMENTALS_TTL)
 def get_mowi_actions():
     """
     Returns a DataFrame with dividends and stock splits.
     """
-    return yf.Ticker(TICKER).actions
+    return _ticker().actions
 
+@ttl_cache(maxsize=1, ttl=FUNDAMENTALS_TTL)
 def get_mowi_financials():
     """
     Returns dicts of major financial statements:
@@ -43,18 +65,34 @@ def get_mowi_financials():
     - balance_sheet
     - cashflow
     """
-    t = yf.Ticker(TICKER)
+    t = _ticker()
     return {
         "income_statement": t.financials,
         "balance_sheet": t.balance_sheet,
         "cashflow": t.cashflow,
     }
 
+@ttl_cache(maxsize=1, ttl=FUNDAMENTALS_TTL)
 def get_mowi_recommendations():
     """
     Returns the analyst recommendation trends.
     """
-    return yf.Ticker(TICKER).recommendations
+    return _ticker().recommendations
+
+def _prime():
+    """
+    Best-effort warm-up of the quote and financial statement caches.
+    """
+    try:
+        get_mowi_data()
+        get_mowi_financials()
+    except Exception:
+        pass
+
+# On Azure, fetch the slow yfinance attributes in the background while the
+# worker is still starting up, so the first real request finds them cached.
+if os.environ.get("AZURE_FUNCTIONS_ENVIRONMENT"):
+    threading.Thread(target=_prime, daemon=True).start()
 
 if __name__ == "__main__":
     print("=== Real-time quote ===")